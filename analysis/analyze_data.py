@@ -25,6 +25,8 @@ import json
 import warnings
 warnings.filterwarnings('ignore')
 
+from head_to_head import HOME, AWAY, build_head_to_head, save_head_to_head, team_index, venue_totals, HEAD_TO_HEAD_FILE
+
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
@@ -171,27 +173,34 @@ all_teams = pd.concat([
 
 print(f"\n  Analyzing {len(all_teams)} teams...")
 
+# Fold all matches into the team x opponent x venue tensor once; per-team
+# records are then sums over the opponent axis instead of frame scans
+h2h = build_head_to_head(matches_df)
+h2h_index = team_index(h2h)
+home_totals = venue_totals(h2h, HOME)
+away_totals = venue_totals(h2h, AWAY)
+
 team_stats_list = []
 
 for team in all_teams:
+    i = h2h_index[team]
+
     # HOME MATCHES
-    home_matches = matches_df[matches_df['home_team'] == team]
-    home_total = len(home_matches)
-    home_wins_count = home_matches['home_win'].sum()
-    home_draws_count = home_matches['draw'].sum()
-    home_losses_count = home_matches['away_win'].sum()
-    home_goals_scored = home_matches['home_goals'].sum()
-    home_goals_conceded = home_matches['away_goals'].sum()
+    home_total = int(home_totals['matches'][i])
+    home_wins_count = home_totals['wins'][i]
+    home_draws_count = home_totals['draws'][i]
+    home_losses_count = home_totals['losses'][i]
+    home_goals_scored = home_totals['goals_for'][i]
+    home_goals_conceded = home_totals['goals_against'][i]
     home_win_rate = (home_wins_count / home_total * 100) if home_total > 0 else 0
     
     # AWAY MATCHES
-    away_matches = matches_df[matches_df['away_team'] == team]
-    away_total = len(away_matches)
-    away_wins_count = away_matches['away_win'].sum()
-    away_draws_count = away_matches['draw'].sum()
-    away_losses_count = away_matches['home_win'].sum()
-    away_goals_scored = away_matches['away_goals'].sum()
-    away_goals_conceded = away_matches['home_goals'].sum()
+    away_total = int(away_totals['matches'][i])
+    away_wins_count = away_totals['wins'][i]
+    away_draws_count = away_totals['draws'][i]
+    away_losses_count = away_totals['losses'][i]
+    away_goals_scored = away_totals['goals_for'][i]
+    away_goals_conceded = away_totals['goals_against'][i]
     away_win_rate = (away_wins_count / away_total * 100) if away_total > 0 else 0
     
     # HOME ADVANTAGE SCORE
@@ -285,7 +294,12 @@ team_performance.to_csv(output_csv, index=False)
 print(f" Saved: {output_csv}")
 print(f"   Contains performance data for {len(team_performance)} teams")
 
-# Save 2: Summary Statistics (JSON)
+# Save 2: Head-to-Head Tensor (NPZ)
+save_head_to_head(h2h)
+print(f" Saved: {HEAD_TO_HEAD_FILE}")
+print(f"   Team x opponent x venue records for pairwise lookups")
+
+# Save 3: Summary Statistics (JSON)
 summary_stats = {
     'dataset_info': {
         'total_matches': int(total_matches),
@@ -354,6 +368,7 @@ print(f"   6. Average team home advantage: {team_performance_filtered['home_adva
 
 print(f"\n OUTPUT FILES:")
 print(f"   - {output_csv}")
+print(f"   - {HEAD_TO_HEAD_FILE}")
 print(f"   - {output_json}")
 
 print(f"\n Ready for Member 4 (Visualization Lead) to create plots!")
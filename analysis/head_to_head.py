@@ -0,0 +1,246 @@
+"""
+head_to_head.py
+CS4625/5625 Final Project
+
+Precomputed head-to-head tensor for pairwise and opponent-adjusted metrics.
+
+The match data is folded once into a dense team x opponent x venue array per
+statistic (matches, wins, draws, losses, goals_for, goals_against), where
+venue 0 is the team playing at home and venue 1 away. Every match is recorded
+from both sides, so h2h['wins'][i, j, HOME] is how often team i beat team j at
+home and h2h['wins'][j, i, AWAY] counts the same results from j's side.
+
+Pairwise lookups are then plain indexing and team-level metrics are array
+reductions, instead of re-filtering matches_df by team name for each question.
+A 20-40 team league is at most a few tens of KB, so the arrays are kept dense.
+
+Outputs (when run as a script):
+- data/processed/head_to_head.npz
+- data/processed/opponent_adjusted_analysis.csv
+"""
+
+import sys
+from pathlib import Path
+import pandas as pd
+import numpy as np
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Determine paths dynamically
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_RAW_DIR = BASE_DIR / "data" / "raw"
+DATA_PROCESSED_DIR = BASE_DIR / "data" / "processed"
+
+# Create output directory if it doesn't exist
+DATA_PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+
+HEAD_TO_HEAD_FILE = DATA_PROCESSED_DIR / 'head_to_head.npz'
+
+# Venue axis
+HOME = 0
+AWAY = 1
+
+FIELDS = ('matches', 'wins', 'draws', 'losses', 'goals_for', 'goals_against')
+
+# Number of best teams (by points per game) treated as "top sides"
+TOP_N = 6
+
+# =============================================================================
+# BUILD & PERSIST
+# =============================================================================
+
+def build_head_to_head(matches_df, teams=None):
+    """Builds the head-to-head tensor from cleaned match data.
+
+    `teams` fixes the team order. The default, sorted names from the data,
+    is the canonical order used for the persisted file.
+    Returns a dict with 'teams' (array of names) and one (n, n, 2) int64
+    array per entry in FIELDS.
+    """
+    if teams is None:
+        teams = sorted(pd.concat([matches_df['home_team'], matches_df['away_team']]).unique())
+    teams = np.asarray(teams, dtype=str)
+    index = pd.Index(teams)
+
+    home = index.get_indexer(matches_df['home_team'])
+    away = index.get_indexer(matches_df['away_team'])
+    if (home < 0).any() or (away < 0).any():
+        raise ValueError("matches_df contains teams not listed in `teams`")
+
+    home_goals = matches_df['home_goals'].to_numpy(dtype=np.int64)
+    away_goals = matches_df['away_goals'].to_numpy(dtype=np.int64)
+    ones = np.ones_like(home_goals)
+    home_win = (home_goals > away_goals).astype(np.int64)
+    away_win = (home_goals < away_goals).astype(np.int64)
+    draw = (home_goals == away_goals).astype(np.int64)
+
+    # Each match contributes one row from the home side and one from the away
+    # side; all fields are scattered into the tensor in a single add.at pass
+    team = np.concatenate([home, away])
+    opponent = np.concatenate([away, home])
+    venue = np.concatenate([np.full(len(home), HOME), np.full(len(away), AWAY)])
+    values = np.column_stack([
+        np.concatenate([ones, ones]),
+        np.concatenate([home_win, away_win]),
+        np.concatenate([draw, draw]),
+        np.concatenate([away_win, home_win]),
+        np.concatenate([home_goals, away_goals]),
+        np.concatenate([away_goals, home_goals])
+    ])
+
+    n = len(teams)
+    tensor = np.zeros((n, n, 2, len(FIELDS)), dtype=np.int64)
+    np.add.at(tensor, (team, opponent, venue), values)
+
+    h2h = {'teams': teams}
+    for k, field in enumerate(FIELDS):
+        h2h[field] = np.ascontiguousarray(tensor[..., k])
+    return h2h
+
+def save_head_to_head(h2h, path=HEAD_TO_HEAD_FILE):
+    """Saves the tensor to a compressed .npz file."""
+    np.savez_compressed(path, **h2h)
+
+def load_head_to_head(path=HEAD_TO_HEAD_FILE):
+    """Loads a tensor saved by save_head_to_head()."""
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+# =============================================================================
+# LOOKUPS & REDUCTIONS
+# =============================================================================
+
+def team_index(h2h):
+    """Returns a {team name: row index} mapping.
+
+    Build it once per tensor and pass it to head_to_head() for O(1) lookups.
+    """
+    return {team: i for i, team in enumerate(h2h['teams'])}
+
+def head_to_head(h2h, index, team, opponent):
+    """Returns team's record against opponent, split by venue.
+
+    `index` is the mapping from team_index(h2h). Result is
+    {'home': {field: value}, 'away': {field: value}}.
+    """
+    i, j = index[team], index[opponent]
+    return {
+        venue_name: {field: int(h2h[field][i, j, venue]) for field in FIELDS}
+        for venue_name, venue in (('home', HOME), ('away', AWAY))
+    }
+
+def venue_totals(h2h, venue, opponents=None):
+    """Sums every field over opponents for one venue.
+
+    `opponents` is an optional boolean mask (length n) restricting the sum,
+    e.g. to top sides. Returns {field: array of length n}.
+    """
+    weights = np.ones(len(h2h['teams']), dtype=np.int64) if opponents is None else np.asarray(opponents, dtype=np.int64)
+    return {field: h2h[field][:, :, venue] @ weights for field in FIELDS}
+
+def points_per_game(h2h):
+    """Returns league points per game for every team (all venues)."""
+    matches = h2h['matches'].sum(axis=(1, 2))
+    points = 3 * h2h['wins'].sum(axis=(1, 2)) + h2h['draws'].sum(axis=(1, 2))
+    return np.divide(points, matches, out=np.zeros(len(matches)), where=matches > 0)
+
+def strength_of_schedule(h2h):
+    """Returns the average points per game of the opponents each team faced,
+    weighted by how often they met."""
+    faced = h2h['matches'].sum(axis=2)
+    total = faced.sum(axis=1)
+    return np.divide(faced @ points_per_game(h2h), total, out=np.zeros(len(total)), where=total > 0)
+
+def opponent_adjusted_home_advantage(h2h):
+    """Returns home win % minus away win % computed opponent by opponent.
+
+    Only opponents met both home and away count, and each counts equally, so
+    a team is not credited with home advantage just because its home fixtures
+    happened to fall against weaker sides.
+    """
+    matches = h2h['matches']
+    wins = h2h['wins']
+    paired = (matches[:, :, HOME] > 0) & (matches[:, :, AWAY] > 0)
+    rate = np.divide(wins, matches, out=np.zeros(matches.shape), where=matches > 0)
+    diff = np.where(paired, rate[:, :, HOME] - rate[:, :, AWAY], 0.0)
+    n_paired = paired.sum(axis=1)
+    return np.divide(diff.sum(axis=1), n_paired, out=np.zeros(len(n_paired)), where=n_paired > 0) * 100
+
+def win_pct(totals):
+    """Win % from a venue_totals() result (0 where no matches were played)."""
+    return np.divide(totals['wins'], totals['matches'], out=np.zeros(len(totals['matches'])), where=totals['matches'] > 0) * 100
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main():
+    print("=" * 80)
+    print("HEAD-TO-HEAD TENSOR & OPPONENT-ADJUSTED HOME ADVANTAGE")
+    print("=" * 80)
+
+    matches_file = DATA_RAW_DIR / 'match_results.csv'
+    if not matches_file.exists():
+        print(f" ERROR: Could not find match_results.csv in {DATA_RAW_DIR}")
+        sys.exit(1)
+
+    # Reuse the persisted tensor unless the match data has changed since
+    if HEAD_TO_HEAD_FILE.exists() and HEAD_TO_HEAD_FILE.stat().st_mtime >= matches_file.stat().st_mtime:
+        h2h = load_head_to_head()
+        print(f"\n Loaded {len(h2h['teams'])} x {len(h2h['teams'])} x 2 tensor from {HEAD_TO_HEAD_FILE}")
+    else:
+        matches_df = pd.read_csv(matches_file)
+        matches_df['date'] = pd.to_datetime(matches_df['date'], errors='coerce')
+        matches_df['home_goals'] = pd.to_numeric(matches_df['home_goals'], errors='coerce')
+        matches_df['away_goals'] = pd.to_numeric(matches_df['away_goals'], errors='coerce')
+        matches_df = matches_df.dropna(subset=['date', 'home_team', 'away_team', 'home_goals', 'away_goals'])
+        matches_df = matches_df.drop_duplicates(subset=['date', 'home_team', 'away_team'])
+
+        h2h = build_head_to_head(matches_df)
+        save_head_to_head(h2h)
+        print(f"\n Built {len(h2h['teams'])} x {len(h2h['teams'])} x 2 tensor from {len(matches_df)} matches")
+        print(f" Saved: {HEAD_TO_HEAD_FILE}")
+
+    ppg = points_per_game(h2h)
+    top = np.zeros(len(ppg), dtype=bool)
+    top[np.argsort(-ppg)[:TOP_N]] = True
+    print(f"\n Top {TOP_N} sides by points per game: {', '.join(h2h['teams'][top])}")
+
+    # Head-to-head between the two best sides, straight from the tensor
+    index = team_index(h2h)
+    first, second = h2h['teams'][np.argsort(-ppg)[:2]]
+    record = head_to_head(h2h, index, first, second)
+    for venue_name in ('home', 'away'):
+        r = record[venue_name]
+        print(f"   {first} vs {second} ({venue_name}): "
+              f"W{r['wins']} D{r['draws']} L{r['losses']}, goals {r['goals_for']}-{r['goals_against']}")
+
+    home_all = venue_totals(h2h, HOME)
+    away_all = venue_totals(h2h, AWAY)
+    home_top = venue_totals(h2h, HOME, opponents=top)
+    away_top = venue_totals(h2h, AWAY, opponents=top)
+
+    results = pd.DataFrame({
+        'team_name': h2h['teams'],
+        'points_per_game': ppg.round(3),
+        'strength_of_schedule': strength_of_schedule(h2h).round(3),
+        'home_advantage': (win_pct(home_all) - win_pct(away_all)).round(2),
+        'opponent_adjusted_home_advantage': opponent_adjusted_home_advantage(h2h).round(2),
+        'home_matches_vs_top': home_top['matches'],
+        'home_win_pct_vs_top': win_pct(home_top).round(2),
+        'away_matches_vs_top': away_top['matches'],
+        'away_win_pct_vs_top': win_pct(away_top).round(2)
+    }).sort_values('opponent_adjusted_home_advantage', ascending=False)
+
+    print(f"\n Opponent-Adjusted Home Advantage:")
+    print(results[['team_name', 'home_advantage', 'opponent_adjusted_home_advantage', 'strength_of_schedule']].to_string(index=False))
+
+    output_csv = DATA_PROCESSED_DIR / 'opponent_adjusted_analysis.csv'
+    results.to_csv(output_csv, index=False)
+    print(f"\n Saved: {output_csv}")
+    print("=" * 80)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+simulate_seasons.py
+CS4625/5625 Final Project
+
+This script estimates how many points and table places home advantage is worth to each team.
+
+Method:
+- Fit home/away attack and defence strengths for every team from match_results.csv
+- Simulate full double round-robin seasons with Poisson-distributed goals
+- Rank each simulated table by points, goal difference, then goals scored
+- Repeat with home advantage removed (neutral venue rates) and compare
+
+Seasons are drawn in batches as 2-D arrays (seasons x fixtures) and split into
+fixed-size tasks that run on a process pool. Every task gets its own child of one
+SeedSequence, so results are reproducible for a given seed regardless of how many
+worker processes are used.
+
+Goals are drawn by inverting the Poisson CDF of uniform draws rather than with
+rng.poisson, whose number of uniforms consumed per draw depends on the value it
+returns. Both scenarios therefore see exactly the same uniforms for every fixture
+(common random numbers), which keeps the with/without comparison low-variance.
+"""
+
+import os
+import sys
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import numpy as np
+from scipy import stats
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Determine paths dynamically
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_RAW_DIR = BASE_DIR / "data" / "raw"
+DATA_PROCESSED_DIR = BASE_DIR / "data" / "processed"
+
+# Create output directory if it doesn't exist
+DATA_PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+
+# Simulation settings
+N_SEASONS = 100_000
+SEED = 4625
+SEASONS_PER_TASK = 10_000     # work unit sent to each worker process
+BATCH_SIZE = 2_000            # seasons drawn at once inside a worker
+N_WORKERS = os.cpu_count() or 1
+
+# Pseudo-matches at the league average added to every team's record, so
+# promoted sides with few matches don't get extreme (or zero) scoring rates
+PRIOR_MATCHES = 5
+
+# Goals per side are capped here; P(X > 20) is negligible for any fitted rate
+MAX_GOALS = 20
+
+# Bottom three places are relegated
+RELEGATION_PLACES = 3
+
+# =============================================================================
+# RATE ESTIMATION
+# =============================================================================
+
+def season_of(dates):
+    """Returns the starting year of the season each date belongs to (Aug-May)."""
+    return np.where(dates.dt.month >= 7, dates.dt.year, dates.dt.year - 1)
+
+def estimate_rates(matches_df, teams):
+    """Fits expected goals for every home/away pairing of `teams`.
+
+    Uses a multiplicative model: expected home goals for i vs j are the league
+    home scoring rate times i's home attack strength times j's away defence
+    weakness, and likewise for away goals.
+
+    Returns (lam_home, lam_away, lam_neutral_home, lam_neutral_away), each an
+    (n, n) array indexed [home team, away team]. The neutral pair averages each
+    team's home and away strengths and uses the mean of the home and away
+    scoring rates, i.e. the same matches with home advantage removed.
+    """
+    mu_home = matches_df['home_goals'].mean()
+    mu_away = matches_df['away_goals'].mean()
+
+    home = matches_df.groupby('home_team').agg(
+        n=('home_goals', 'size'), gf=('home_goals', 'sum'), ga=('away_goals', 'sum')
+    ).reindex(teams, fill_value=0)
+    away = matches_df.groupby('away_team').agg(
+        n=('away_goals', 'size'), gf=('away_goals', 'sum'), ga=('home_goals', 'sum')
+    ).reindex(teams, fill_value=0)
+
+    def strength(goals, n, mu):
+        return ((goals + PRIOR_MATCHES * mu) / (n + PRIOR_MATCHES) / mu).to_numpy()
+
+    att_home = strength(home['gf'], home['n'], mu_home)
+    def_home = strength(home['ga'], home['n'], mu_away)
+    att_away = strength(away['gf'], away['n'], mu_away)
+    def_away = strength(away['ga'], away['n'], mu_home)
+
+    lam_home = mu_home * np.outer(att_home, def_away)
+    lam_away = mu_away * np.outer(def_home, att_away)
+
+    mu_neutral = (mu_home + mu_away) / 2
+    att = (att_home + att_away) / 2
+    dfn = (def_home + def_away) / 2
+    lam_neutral_home = mu_neutral * np.outer(att, dfn)
+    lam_neutral_away = mu_neutral * np.outer(dfn, att)
+
+    return lam_home, lam_away, lam_neutral_home, lam_neutral_away
+
+# =============================================================================
+# SIMULATION ENGINE
+# =============================================================================
+
+def simulate_task(lam_home, lam_away, n_seasons, seed):
+    """Simulates `n_seasons` seasons and returns summed table statistics.
+
+    `lam_home`/`lam_away` are (n, n) expected-goal arrays indexed
+    [home team, away team]; the diagonal is ignored. Returns a dict of sums
+    over all simulated seasons: points, home_points, away_points,
+    goal_difference, position (each shape (n,)) and position_counts
+    (shape (n, n), team x finishing place).
+    """
+    rng = np.random.default_rng(seed)
+    n_teams = lam_home.shape[0]
+
+    # Every ordered pair plays once: fixtures as (home, away) index vectors
+    home_idx, away_idx = np.nonzero(~np.eye(n_teams, dtype=bool))
+    fixture_lam_home = lam_home[home_idx, away_idx]
+    fixture_lam_away = lam_away[home_idx, away_idx]
+
+    # Per-fixture Poisson CDF tables, (fixtures, MAX_GOALS): goals for a
+    # uniform u are the number of CDF values below u (inverse-CDF sampling)
+    goal_range = np.arange(MAX_GOALS)
+    cdf_home = stats.poisson.cdf(goal_range, fixture_lam_home[:, None])
+    cdf_away = stats.poisson.cdf(goal_range, fixture_lam_away[:, None])
+
+    # Fixture -> team incidence matrices turn per-match results into per-team
+    # season totals with one matrix product per batch
+    home_of = np.zeros((len(home_idx), n_teams))
+    home_of[np.arange(len(home_idx)), home_idx] = 1
+    away_of = np.zeros((len(away_idx), n_teams))
+    away_of[np.arange(len(away_idx)), away_idx] = 1
+
+    places = np.arange(1, n_teams + 1)
+    totals = {
+        'points': np.zeros(n_teams),
+        'home_points': np.zeros(n_teams),
+        'away_points': np.zeros(n_teams),
+        'goal_difference': np.zeros(n_teams),
+        'position': np.zeros(n_teams),
+        'position_counts': np.zeros((n_teams, n_teams), dtype=np.int64)
+    }
+
+    remaining = n_seasons
+    while remaining > 0:
+        batch = min(BATCH_SIZE, remaining)
+        remaining -= batch
+
+        u_home = rng.random((batch, len(home_idx)))
+        u_away = rng.random((batch, len(away_idx)))
+        home_goals = np.zeros((batch, len(home_idx)))
+        away_goals = np.zeros((batch, len(away_idx)))
+        for k in range(MAX_GOALS):
+            home_goals += u_home > cdf_home[:, k]
+            away_goals += u_away > cdf_away[:, k]
+
+        draw = home_goals == away_goals
+        home_points = 3.0 * (home_goals > away_goals) + draw
+        away_points = 3.0 * (home_goals < away_goals) + draw
+
+        points_at_home = home_points @ home_of
+        points_away = away_points @ away_of
+        points = points_at_home + points_away
+        goals_for = home_goals @ home_of + away_goals @ away_of
+        goals_against = away_goals @ home_of + home_goals @ away_of
+        goal_difference = goals_for - goals_against
+
+        # Rank by points, then goal difference, then goals scored; any
+        # remaining ties are broken at random (lexsort: last key is primary)
+        tiebreak = rng.random((batch, n_teams))
+        order = np.lexsort((tiebreak, goals_for, goal_difference, points), axis=-1)[:, ::-1]
+        position = np.empty((batch, n_teams), dtype=np.int64)
+        np.put_along_axis(position, order, np.broadcast_to(places, (batch, n_teams)), axis=1)
+
+        totals['points'] += points.sum(axis=0)
+        totals['home_points'] += points_at_home.sum(axis=0)
+        totals['away_points'] += points_away.sum(axis=0)
+        totals['goal_difference'] += goal_difference.sum(axis=0)
+        totals['position'] += position.sum(axis=0)
+        flat = np.arange(n_teams) * n_teams + (position - 1)
+        totals['position_counts'] += np.bincount(
+            flat.ravel(), minlength=n_teams * n_teams
+        ).reshape(n_teams, n_teams)
+
+    return totals
+
+def run_simulation(lam_home, lam_away, n_seasons=N_SEASONS, seed=SEED, workers=N_WORKERS):
+    """Runs `n_seasons` simulated seasons on a process pool.
+
+    Returns per-team means of points (total, in home fixtures and in away
+    fixtures), goal difference and position, plus the (n, n) matrix of
+    finishing-place probabilities.
+    """
+    n_tasks = -(-n_seasons // SEASONS_PER_TASK)
+    task_sizes = [SEASONS_PER_TASK] * (n_tasks - 1) + [n_seasons - SEASONS_PER_TASK * (n_tasks - 1)]
+    seeds = np.random.SeedSequence(seed).spawn(n_tasks)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(
+            simulate_task,
+            [lam_home] * n_tasks, [lam_away] * n_tasks, task_sizes, seeds
+        ))
+
+    totals = {key: sum(r[key] for r in results) for key in results[0]}
+    return {
+        'points': totals['points'] / n_seasons,
+        'home_points': totals['home_points'] / n_seasons,
+        'away_points': totals['away_points'] / n_seasons,
+        'goal_difference': totals['goal_difference'] / n_seasons,
+        'position': totals['position'] / n_seasons,
+        'position_probs': totals['position_counts'] / n_seasons
+    }
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main():
+    print("=" * 80)
+    print("PREMIER LEAGUE HOME ADVANTAGE: MONTE CARLO SEASON SIMULATION")
+    print("=" * 80)
+
+    print("\n STEP 1: Loading Data...")
+
+    try:
+        matches_df = pd.read_csv(DATA_RAW_DIR / 'match_results.csv')
+    except FileNotFoundError:
+        print(f" ERROR: Could not find match_results.csv in {DATA_RAW_DIR}")
+        sys.exit(1)
+
+    matches_df['date'] = pd.to_datetime(matches_df['date'], errors='coerce')
+    matches_df['home_goals'] = pd.to_numeric(matches_df['home_goals'], errors='coerce')
+    matches_df['away_goals'] = pd.to_numeric(matches_df['away_goals'], errors='coerce')
+    matches_df = matches_df.dropna(subset=['date', 'home_team', 'away_team', 'home_goals', 'away_goals'])
+    matches_df = matches_df.drop_duplicates(subset=['date', 'home_team', 'away_team'])
+    print(f" Loaded {len(matches_df)} valid matches")
+
+    # Simulate the league as it stood in the most recent season
+    matches_df['season'] = season_of(matches_df['date'])
+    latest = matches_df[matches_df['season'] == matches_df['season'].max()]
+    teams = sorted(pd.concat([latest['home_team'], latest['away_team']]).unique())
+    print(f" Simulating the {latest['season'].iloc[0]}-{str(latest['season'].iloc[0] + 1)[-2:]} league: {len(teams)} teams")
+
+    print("\n STEP 2: Estimating Scoring Rates...")
+    lam_home, lam_away, lam_neutral_home, lam_neutral_away = estimate_rates(matches_df, teams)
+    print(f"   League home goals/match: {matches_df['home_goals'].mean():.3f}")
+    print(f"   League away goals/match: {matches_df['away_goals'].mean():.3f}")
+
+    print(f"\n STEP 3: Simulating {N_SEASONS:,} seasons per scenario ({N_WORKERS} workers, seed {SEED})...")
+    with_ha = run_simulation(lam_home, lam_away)
+    print("   Scenario 1 (with home advantage) complete")
+    without_ha = run_simulation(lam_neutral_home, lam_neutral_away)
+    print("   Scenario 2 (neutral venues) complete")
+
+    n_teams = len(teams)
+    results = pd.DataFrame({
+        'team_name': teams,
+        'exp_points_with_ha': with_ha['points'].round(2),
+        'exp_points_without_ha': without_ha['points'].round(2),
+        'ha_home_points_gained': (with_ha['home_points'] - without_ha['home_points']).round(2),
+        'ha_away_points_lost': (without_ha['away_points'] - with_ha['away_points']).round(2),
+        # Home gains and away losses cancel across a balanced league, so the
+        # net figure is each team's home advantage relative to the league
+        'ha_net_points_vs_league': (with_ha['points'] - without_ha['points']).round(2),
+        'exp_position_with_ha': with_ha['position'].round(2),
+        'exp_position_without_ha': without_ha['position'].round(2),
+        'ha_places': (without_ha['position'] - with_ha['position']).round(2),
+        'exp_goal_diff_with_ha': with_ha['goal_difference'].round(2),
+        'exp_goal_diff_without_ha': without_ha['goal_difference'].round(2),
+        'p_title_with_ha': with_ha['position_probs'][:, 0].round(4),
+        'p_title_without_ha': without_ha['position_probs'][:, 0].round(4),
+        'p_relegation_with_ha': with_ha['position_probs'][:, n_teams - RELEGATION_PLACES:].sum(axis=1).round(4),
+        'p_relegation_without_ha': without_ha['position_probs'][:, n_teams - RELEGATION_PLACES:].sum(axis=1).round(4)
+    }).sort_values('ha_home_points_gained', ascending=False)
+
+    print("\n" + "=" * 80)
+    print("RESULTS: WHAT HOME ADVANTAGE IS WORTH")
+    print("=" * 80)
+    print(results[['team_name', 'ha_home_points_gained', 'ha_away_points_lost', 'ha_net_points_vs_league', 'ha_places']].to_string(index=False))
+    print(f"\n   Points gained in home fixtures per season: {results['ha_home_points_gained'].mean():.2f} on average "
+          f"({results['ha_home_points_gained'].min():.2f} to {results['ha_home_points_gained'].max():.2f})")
+    print(f"   Points lost in away fixtures per season: {results['ha_away_points_lost'].mean():.2f} on average "
+          f"({results['ha_away_points_lost'].min():.2f} to {results['ha_away_points_lost'].max():.2f})")
+
+    net = results.sort_values('ha_net_points_vs_league', ascending=False)
+    print(f"\n   Net home advantage relative to the league (home gain - away loss):")
+    print(f"   Most: {net.iloc[0]['team_name']} ({net.iloc[0]['ha_net_points_vs_league']:+.2f} pts)")
+    print(f"   Least: {net.iloc[-1]['team_name']} ({net.iloc[-1]['ha_net_points_vs_league']:+.2f} pts)")
+
+    output_csv = DATA_PROCESSED_DIR / 'home_advantage_simulation.csv'
+    results.to_csv(output_csv, index=False)
+    print(f"\n Saved: {output_csv}")
+    print("=" * 80)
+
+if __name__ == "__main__":
+    main()
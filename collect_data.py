@@ -7,18 +7,22 @@ This script implements the data collection pipeline:
 1. Connects to DBpedia to fetch Premier League team metadata.
 2. Connects to Wikidata to fetch match results (2020-2024).
    * FALLBACK: If SPARQL fails or returns < 50 matches, downloads official CSVs from football-data.co.uk.
-3. Connects to DBpedia for aggregate team statistics.
-4. Cleans, normalizes, and saves data to CSV format.
+3. Enriches the clubs that appear in the match data with DBpedia stadium,
+   capacity, location and founding data (batched VALUES queries, cached per URI).
+4. Connects to DBpedia for aggregate team statistics.
+5. Cleans, normalizes, and saves data to CSV format.
 """
 
 import sys
 import time
 import json
+import http.client
+import urllib.parse
 import urllib.request
 import io
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import pandas as pd
-from SPARQLWrapper import SPARQLWrapper, JSON
 
 # =============================================================================
 # CONFIGURATION
@@ -38,6 +42,42 @@ WIKIDATA_ENDPOINT = "https://query.wikidata.org/sparql"
 # User Agent to be polite to Wikipedia/DBpedia servers
 USER_AGENT = "CS4625-Student-Project/1.0 (contact@example.university.edu)"
 
+# Results are requested as CSV and parsed in chunks of this many rows
+RESULT_CHUNK_SIZE = 5000
+QUERY_TIMEOUT = 120
+
+# Club enrichment: URIs per VALUES block, concurrent requests, and the
+# per-URI cache that lets later runs query only clubs never seen before.
+# Clubs are looked up by their Wikidata URI when the match data has one
+# (resolved to DBpedia via owl:sameAs), otherwise by a DBpedia URI derived
+# from the club name.
+ENRICHMENT_BATCH_SIZE = 10
+ENRICHMENT_WORKERS = 4
+CLUB_CACHE_FILE = DATA_RAW_DIR / "club_metadata_cache.json"
+
+WIKIDATA_ENTITY_PREFIX = "http://www.wikidata.org/entity/"
+
+# Club names come as football-data.co.uk short names ("Man City") or as
+# Wikidata English labels ("Manchester City F.C."). Names not listed here map
+# to http://dbpedia.org/resource/<Name>, with "_F.C." appended if missing.
+CLUB_URIS = {
+    'Bournemouth': 'http://dbpedia.org/resource/AFC_Bournemouth',
+    'AFC Bournemouth': 'http://dbpedia.org/resource/AFC_Bournemouth',
+    'Brighton': 'http://dbpedia.org/resource/Brighton_&_Hove_Albion_F.C.',
+    'Leeds': 'http://dbpedia.org/resource/Leeds_United_F.C.',
+    'Leicester': 'http://dbpedia.org/resource/Leicester_City_F.C.',
+    'Luton': 'http://dbpedia.org/resource/Luton_Town_F.C.',
+    'Man City': 'http://dbpedia.org/resource/Manchester_City_F.C.',
+    'Man United': 'http://dbpedia.org/resource/Manchester_United_F.C.',
+    'Newcastle': 'http://dbpedia.org/resource/Newcastle_United_F.C.',
+    'Norwich': 'http://dbpedia.org/resource/Norwich_City_F.C.',
+    "Nott'm Forest": 'http://dbpedia.org/resource/Nottingham_Forest_F.C.',
+    'Tottenham': 'http://dbpedia.org/resource/Tottenham_Hotspur_F.C.',
+    'West Brom': 'http://dbpedia.org/resource/West_Bromwich_Albion_F.C.',
+    'West Ham': 'http://dbpedia.org/resource/West_Ham_United_F.C.',
+    'Wolves': 'http://dbpedia.org/resource/Wolverhampton_Wanderers_F.C.'
+}
+
 # =============================================================================
 # SPARQL QUERIES
 # =============================================================================
@@ -111,28 +151,116 @@ SELECT ?team ?teamName ?wins ?losses ?draws ?goalsFor ?goalsAgainst WHERE {
 LIMIT 100
 """
 
+# Query 4: Club Enrichment (DBpedia) - {values} is replaced by a batch of source
+# URIs and {resolve} by RESOLVE_DBPEDIA or RESOLVE_WIKIDATA. Sources that do not
+# resolve to an existing DBpedia resource return no row.
+QUERY_CLUBS = """
+PREFIX dbo: <http://dbpedia.org/ontology/>
+PREFIX owl: <http://www.w3.org/2002/07/owl#>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+
+SELECT ?source (SAMPLE(?team) AS ?dbpedia) (SAMPLE(?ground) AS ?stadium)
+       (MAX(COALESCE(?groundCapacity, ?clubCapacity)) AS ?capacity)
+       (SAMPLE(COALESCE(?clubLocation, ?groundLocation)) AS ?location)
+       (SAMPLE(COALESCE(?foundingDate, ?foundingYear)) AS ?founded)
+WHERE {
+  VALUES ?source { {values} }
+  {resolve}
+  FILTER EXISTS { ?team rdfs:label ?anyLabel }
+  OPTIONAL {
+    ?team dbo:ground ?ground .
+    OPTIONAL { ?ground dbo:seatingCapacity ?groundCapacity . }
+    OPTIONAL { ?ground dbo:location ?groundLocation . }
+  }
+  OPTIONAL { ?team dbo:capacity ?clubCapacity . }
+  OPTIONAL { ?team dbo:location ?clubLocation . }
+  OPTIONAL { ?team dbo:foundingDate ?foundingDate . }
+  OPTIONAL { ?team dbo:foundingYear ?foundingYear . }
+}
+GROUP BY ?source
+"""
+
+RESOLVE_DBPEDIA = "BIND (?source AS ?team)"
+RESOLVE_WIKIDATA = """?team owl:sameAs ?source .
+  FILTER (STRSTARTS(STR(?team), "http://dbpedia.org/resource/"))"""
+
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
 
-def execute_query(endpoint, query, description):
-    """Executes SPARQL query with retry logic."""
+def open_query(endpoint, query):
+    """Opens a SPARQL request for CSV results.
+
+    Returns the raw HTTP response so the body can be streamed rather than
+    parsed into nested dicts in one go.
+    """
+    request = urllib.request.Request(
+        endpoint,
+        data=urllib.parse.urlencode({'query': query}).encode('utf-8'),
+        headers={
+            'Accept': 'text/csv',
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'User-Agent': USER_AGENT
+        }
+    )
+    return urllib.request.urlopen(request, timeout=QUERY_TIMEOUT)
+
+def stream_query(endpoint, query, columns, required=(), chunksize=RESULT_CHUNK_SIZE):
+    """Executes SPARQL query and yields the results as DataFrame chunks.
+
+    `columns` maps SPARQL variable names to output column names; only those
+    variables are parsed. Rows are read straight from the response stream by
+    pandas' C parser, `chunksize` rows at a time, so peak memory is bounded
+    by the chunk size rather than the size of the result set.
+
+    `required` lists variables every genuine result row binds. A row missing
+    one means the body is not a clean result set (e.g. Wikidata appending a
+    stack trace after a mid-stream timeout) and raises ValueError.
+    """
+    with open_query(endpoint, query) as response:
+        # Every column is parsed as text so types can't drift between chunks
+        # (e.g. a year column turning float when one value is missing); callers
+        # convert the columns they need with pd.to_numeric/pd.to_datetime.
+        # Unbound variables come back as empty fields; keep everything else
+        # (e.g. a club literally called "None") as text.
+        reader = pd.read_csv(
+            response,
+            usecols=list(columns),
+            dtype=str,
+            chunksize=chunksize,
+            encoding='utf-8',
+            keep_default_na=False,
+            na_values=['']
+        )
+        for chunk in reader:
+            if chunk[list(required)].isna().to_numpy().any():
+                raise ValueError("result rows with unbound required variables; response is truncated or malformed")
+            yield chunk.rename(columns=columns)
+
+def query_dataframe(endpoint, query, description, columns, required=(), chunksize=RESULT_CHUNK_SIZE):
+    """Executes SPARQL query with retry logic and returns one DataFrame.
+
+    Request and parse errors (bad status, HTML/error bodies, truncated
+    streams, timeouts) are retried; after the last attempt an empty
+    DataFrame is returned so callers can fall back.
+    """
     print(f"\n⏳ {description}...")
-    sparql = SPARQLWrapper(endpoint)
-    sparql.setQuery(query)
-    sparql.setReturnFormat(JSON)
-    sparql.addCustomHttpHeader("User-Agent", USER_AGENT)
 
     retries = 3
     for i in range(retries):
         try:
-            return sparql.query().convert()
-        except Exception as e:
+            chunks = list(stream_query(endpoint, query, columns, required, chunksize))
+            if not chunks:
+                return pd.DataFrame(columns=list(columns.values()))
+            return pd.concat(chunks, ignore_index=True)
+        except (ValueError, OSError, http.client.HTTPException) as e:
+            # pd.errors.ParserError and EmptyDataError are ValueErrors;
+            # URLError and socket timeouts are OSErrors
             print(f"   ⚠️ Attempt {i+1} failed: {e}")
             time.sleep(2)
-    
+
     print(f"   ❌ Failed to retrieve data for {description}")
-    return None
+    return pd.DataFrame(columns=list(columns.values()))
 
 def fetch_fallback_data():
     """Downloads CSV data from football-data.co.uk if SPARQL fails."""
@@ -187,6 +315,146 @@ def fetch_fallback_data():
         print("   ❌ Backup Source Failed.")
         return pd.DataFrame()
 
+def club_uri(team_name):
+    """Maps a club name from the match data to its DBpedia resource URI."""
+    if team_name in CLUB_URIS:
+        return CLUB_URIS[team_name]
+    resource = team_name.strip().replace(' ', '_')
+    if not resource.endswith('F.C.'):
+        resource += '_F.C.'
+    return f"http://dbpedia.org/resource/{resource}"
+
+def club_sources(df_matches):
+    """Returns {club name: lookup URI} for every club in the match data.
+
+    Wikidata team URIs from the SPARQL path are preferred; clubs that only
+    appear in fallback rows get a DBpedia URI derived from their name.
+    """
+    sources = {}
+    for side in ('home', 'away'):
+        if f'{side}_team_uri' in df_matches.columns:
+            pairs = df_matches[[f'{side}_team', f'{side}_team_uri']].dropna()
+            sources.update(zip(pairs[f'{side}_team'], pairs[f'{side}_team_uri']))
+
+    names = pd.concat([df_matches['home_team'], df_matches['away_team']]).dropna().unique()
+    for name in names:
+        if name not in sources:
+            sources[name] = club_uri(name)
+    return dict(sorted(sources.items()))
+
+def normalize_club_record(record):
+    """Returns a copy of a club record with capacity as int and founded as text.
+
+    Capacity is a whole number of seats; founded is a date or a year, with any
+    float artefact such as "1879.0" reduced to "1879". Missing values are None.
+    """
+    record = dict(record)
+
+    try:
+        record['capacity'] = int(float(record.get('capacity')))
+    except (TypeError, ValueError, OverflowError):
+        record['capacity'] = None
+
+    founded = record.get('founded')
+    if founded is None or (isinstance(founded, float) and pd.isna(founded)):
+        record['founded'] = None
+    else:
+        founded = str(founded).strip()
+        if founded.endswith('.0') and founded[:-2].isdigit():
+            founded = founded[:-2]
+        record['founded'] = founded or None
+    return record
+
+def load_club_cache():
+    """Loads cached club metadata keyed by lookup (Wikidata or DBpedia) URI.
+
+    Entries are normalized on load and the file is rewritten if any changed,
+    so values cached by older runs (e.g. "founded": 1879.0) are repaired.
+    """
+    if not CLUB_CACHE_FILE.exists():
+        return {}
+    with open(CLUB_CACHE_FILE, encoding='utf-8') as f:
+        cache = json.load(f)
+    normalized = {uri: normalize_club_record(record) for uri, record in cache.items()}
+    if normalized != cache:
+        save_club_cache(normalized)
+    return normalized
+
+def save_club_cache(cache):
+    """Writes club metadata cache back to disk."""
+    with open(CLUB_CACHE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=4, sort_keys=True)
+
+def fetch_club_batch(uris):
+    """Runs QUERY_CLUBS for one batch of URIs of the same kind via a VALUES block."""
+    resolve = RESOLVE_WIKIDATA if uris[0].startswith(WIKIDATA_ENTITY_PREFIX) else RESOLVE_DBPEDIA
+    values = " ".join(f"<{uri}>" for uri in uris)
+    return query_dataframe(
+        DBPEDIA_ENDPOINT,
+        QUERY_CLUBS.replace("{values}", values).replace("{resolve}", resolve),
+        f"Enriching {len(uris)} clubs ({uris[0].rsplit('/', 1)[-1]} ...)",
+        {'source': 'source_uri', 'dbpedia': 'dbpedia_uri', 'stadium': 'stadium', 'capacity': 'capacity', 'location': 'location', 'founded': 'founded'},
+        required=['source', 'dbpedia']
+    )
+
+def enrich_clubs(df_matches, batch_size=ENRICHMENT_BATCH_SIZE, workers=ENRICHMENT_WORKERS):
+    """Looks up stadium, capacity, location and founding data for the clubs
+    in the match data.
+
+    Only URIs missing from the cache are queried, `batch_size` per VALUES
+    block with up to `workers` requests in flight. Every club DBpedia knows
+    is cached, even when it has no metadata, so it is not asked for again;
+    URIs that don't resolve and batches that fail are retried next run.
+    Returns one row per club name.
+    """
+    cache = load_club_cache()
+    sources = club_sources(df_matches)
+    missing = sorted(set(sources.values()) - set(cache))
+    print(f"\n🔎 Club enrichment: {len(sources)} clubs, {len(sources) - len(missing)} cached, {len(missing)} to query")
+
+    if missing:
+        wikidata = [uri for uri in missing if uri.startswith(WIKIDATA_ENTITY_PREFIX)]
+        dbpedia = [uri for uri in missing if not uri.startswith(WIKIDATA_ENTITY_PREFIX)]
+        batches = [group[i:i + batch_size] for group in (wikidata, dbpedia) for i in range(0, len(group), batch_size)]
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(fetch_club_batch, batch): batch for batch in batches}
+                for future in as_completed(futures):
+                    try:
+                        df_batch = future.result()
+                    except Exception as e:
+                        print(f"   ⚠️ Enrichment batch failed: {e}")
+                        continue
+                    # NaN is not valid JSON; store unbound values as None
+                    df_batch = df_batch.astype(object).where(df_batch.notna(), None)
+                    requested = set(futures[future])
+                    for record in df_batch.to_dict('records'):
+                        source = record.pop('source_uri')
+                        if source in requested:
+                            cache[source] = normalize_club_record(record)
+        finally:
+            save_club_cache(cache)
+
+        still_missing = set(missing) - set(cache)
+        if still_missing:
+            print(f"   ⚠️ {len(still_missing)} clubs could not be resolved; they will be retried next run")
+
+    rows = []
+    for name, source in sources.items():
+        info = cache.get(source, {})
+        rows.append({
+            'team_name': name,
+            'team_uri': info.get('dbpedia_uri') or source,
+            'stadium': info.get('stadium') or 'Unknown',
+            'capacity': info.get('capacity') or 0,
+            'location': info.get('location') or 'Unknown',
+            'founded': info.get('founded') or 'Unknown'
+        })
+    df_clubs = pd.DataFrame(rows)
+    df_clubs['capacity'] = pd.to_numeric(df_clubs['capacity'], errors='coerce').fillna(0).astype(int)
+    return df_clubs
+
 def save_csv(df, filename):
     """Saves DataFrame to CSV and logs it."""
     filepath = DATA_RAW_DIR / filename
@@ -205,47 +473,38 @@ def run_pipeline():
     # ---------------------------------------------------------
     # 1. FETCH TEAMS
     # ---------------------------------------------------------
-    data = execute_query(DBPEDIA_ENDPOINT, QUERY_TEAMS, "Fetching Premier League Teams")
-    
-    if data:
-        teams_list = []
-        for item in data['results']['bindings']:
-            teams_list.append({
-                'team_uri': item.get('team', {}).get('value'),
-                'team_name': item.get('teamName', {}).get('value'),
-                'stadium': item.get('stadium', {}).get('value', 'Unknown'),
-                'founded': item.get('founded', {}).get('value', 'Unknown')
-            })
-        
-        df_teams = pd.DataFrame(teams_list)
-        if not df_teams.empty:
-            df_teams.drop_duplicates(subset=['team_uri'], inplace=True)
-            df_teams['team_name'] = df_teams['team_name'].str.strip()
-            print(f"   ✅ Retrieved {len(df_teams)} unique teams")
-            save_csv(df_teams, 'premier_league_teams.csv')
-        else:
-            print("   ⚠️ No team data found.")
+    df_teams = query_dataframe(DBPEDIA_ENDPOINT, QUERY_TEAMS, "Fetching Premier League Teams", {
+        'team': 'team_uri',
+        'teamName': 'team_name',
+        'stadium': 'stadium',
+        'founded': 'founded'
+    }, required=['team', 'teamName'])
+
+    if not df_teams.empty:
+        df_teams[['stadium', 'founded']] = df_teams[['stadium', 'founded']].fillna('Unknown')
+        df_teams.drop_duplicates(subset=['team_uri'], inplace=True)
+        df_teams['team_name'] = df_teams['team_name'].str.strip()
+        print(f"   ✅ Retrieved {len(df_teams)} unique teams")
+        save_csv(df_teams, 'premier_league_teams.csv')
+    else:
+        print("   ⚠️ No team data found.")
 
     # ---------------------------------------------------------
     # 2. FETCH MATCHES (With Fallback)
     # ---------------------------------------------------------
-    data = execute_query(WIKIDATA_ENDPOINT, QUERY_MATCHES, "Fetching Match Results (2020-2024)")
-    df_matches = pd.DataFrame()
-    
+    df_matches = query_dataframe(WIKIDATA_ENDPOINT, QUERY_MATCHES, "Fetching Match Results (2020-2024)", {
+        'match': 'match_uri',
+        'date': 'date',
+        'homeTeamLabel': 'home_team',
+        'awayTeamLabel': 'away_team',
+        'homeGoals': 'home_goals',
+        'awayGoals': 'away_goals',
+        'homeTeam': 'home_team_uri',
+        'awayTeam': 'away_team_uri'
+    }, required=['match', 'date', 'homeTeam', 'homeTeamLabel', 'awayTeam', 'awayTeamLabel', 'homeGoals', 'awayGoals'])
+
     # Try processing SPARQL results first
-    if data and "results" in data and "bindings" in data["results"] and len(data["results"]["bindings"]) > 0:
-        matches_list = []
-        for item in data["results"]["bindings"]:
-            matches_list.append({
-                'match_uri': item.get('match', {}).get('value'),
-                'date': item.get('date', {}).get('value'),
-                'home_team': item.get('homeTeamLabel', {}).get('value'),
-                'away_team': item.get('awayTeamLabel', {}).get('value'),
-                'home_goals': item.get('homeGoals', {}).get('value'),
-                'away_goals': item.get('awayGoals', {}).get('value')
-            })
-        df_matches = pd.DataFrame(matches_list)
-        
+    if not df_matches.empty:
         # Clean SPARQL data
         df_matches['date'] = pd.to_datetime(df_matches['date'], errors='coerce')
         df_matches['home_goals'] = pd.to_numeric(df_matches['home_goals'], errors='coerce')
@@ -272,20 +531,25 @@ def run_pipeline():
         print("   ❌ CRITICAL: No match data found from either SPARQL or Fallback.")
 
     # ---------------------------------------------------------
-    # 3. FETCH STATS (Validation)
+    # 3. ENRICH CLUBS SEEN IN MATCH DATA
+    # ---------------------------------------------------------
+    if not df_matches.empty:
+        df_clubs = enrich_clubs(df_matches)
+        print(f"   ✅ Metadata for {len(df_clubs)} clubs ({(df_clubs['stadium'] != 'Unknown').sum()} with a known stadium)")
+        save_csv(df_clubs, 'club_metadata.csv')
+
+    # ---------------------------------------------------------
+    # 4. FETCH STATS (Validation)
     # ---------------------------------------------------------
-    data = execute_query(DBPEDIA_ENDPOINT, QUERY_STATS, "Fetching Team Statistics")
-    if data:
-        stats_list = []
-        for item in data['results']['bindings']:
-            stats_list.append({
-                'team_name': item.get('teamName', {}).get('value'),
-                'wins': item.get('wins', {}).get('value', 0),
-                'goals_for': item.get('goalsFor', {}).get('value', 0)
-            })
-        df_stats = pd.DataFrame(stats_list)
-        if not df_stats.empty:
-            save_csv(df_stats, 'team_stats.csv')
+    df_stats = query_dataframe(DBPEDIA_ENDPOINT, QUERY_STATS, "Fetching Team Statistics", {
+        'teamName': 'team_name',
+        'wins': 'wins',
+        'goalsFor': 'goals_for'
+    }, required=['teamName'])
+    if not df_stats.empty:
+        for col in ['wins', 'goals_for']:
+            df_stats[col] = pd.to_numeric(df_stats[col], errors='coerce').fillna(0).astype(int)
+        save_csv(df_stats, 'team_stats.csv')
 
     print("\n" + "="*60)
     print("PIPELINE COMPLETE")